@@ -0,0 +1,101 @@
+# Copyright 2020-2025 The HuggingFace Team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+from trl.trainer.trajectory_logger import TrajectoryLogger
+
+from .testing_utils import TrlTestCase
+
+
+class FakeTokenizer:
+    """Minimal tokenizer stand-in: decodes token ids to their space-joined repr."""
+
+    def batch_decode(self, ids_list, skip_special_tokens=True):
+        return [" ".join(map(str, ids)) for ids in ids_list]
+
+
+def make_rewards(num_prompts, num_generations, trajectory_length=2):
+    return [
+        [
+            {"reward": 1.0, "trajectory_length": trajectory_length, "done": True, "terminated_naturally": True}
+            for _ in range(num_generations)
+        ]
+        for _ in range(num_prompts)
+    ]
+
+
+class TestTrajectoryLogger(TrlTestCase):
+    def read_step_file(self, logger, step, mode):
+        logger.flush()
+        path = os.path.join(logger.output_dir, "trajectories", f"step{step:06d}_{mode}.jsonl")
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_log_and_finalize_round_trip(self):
+        logger = TrajectoryLogger(self.tmp_dir, save_images=False)
+        tokenizer = FakeTokenizer()
+        for prompt_idx in range(2):
+            logger.log_turn(1, prompt_idx, 0, 0, [10, 11], "first response", processing_class=tokenizer)
+            logger.log_turn(1, prompt_idx, 0, 1, [10, 11, 12], "second response", processing_class=tokenizer)
+        logger.finalize_trajectories(make_rewards(2, 1), 1, "train")
+
+        records = self.read_step_file(logger, 1, "train")
+        logger.close()
+
+        assert len(records) == 2
+        assert records[0]["trajectory_id"] == "step000001_p000_g00"
+        assert records[0]["reward"] == 1.0
+        assert records[0]["metadata"]["mode"] == "train"
+        assert records[0]["metadata"]["trajectory_length"] == 2
+        turns = records[0]["turns"]
+        # First turn stores the full prompt, the second only the new suffix
+        assert turns[0]["prompt"] == "10 11"
+        assert turns[0]["response"] == "first response"
+        assert turns[1]["prompt_delta"] == "12"
+        assert turns[1]["prompt_prefix_len"] == 2
+        assert turns[1]["response"] == "second response"
+
+    def test_cap_across_two_rounds_at_same_step(self):
+        logger = TrajectoryLogger(self.tmp_dir, save_images=False, max_trajectories_per_step=2)
+        tokenizer = FakeTokenizer()
+        # Two rollout rounds at the same global step (e.g. train then eval); the
+        # second must re-sample from scratch rather than evict from the emptied
+        # reservoir
+        for mode in ("train", "eval"):
+            for prompt_idx in range(5):
+                logger.log_turn(7, prompt_idx, 0, 0, [1, 2], "response", processing_class=tokenizer)
+            assert len(logger.active_trajectories) == 2
+            logger.finalize_trajectories(make_rewards(5, 1), 7, mode)
+            records = self.read_step_file(logger, 7, mode)
+            assert len(records) == 2
+        assert len(logger.active_trajectories) == 0
+        logger.close()
+
+    def test_generate_html_report(self):
+        logger = TrajectoryLogger(self.tmp_dir, save_images=False)
+        tokenizer = FakeTokenizer()
+        logger.log_turn(2, 0, 0, 0, [5, 6], "hello <world>", processing_class=tokenizer)
+        logger.finalize_trajectories(make_rewards(1, 1, trajectory_length=1), 2, "train")
+
+        report_path = logger.generate_html_report(step=2)
+        logger.close()
+
+        with open(report_path) as f:
+            html = f.read()
+        assert "step000002_p000_g00" in html
+        assert "5 6" in html
+        # Response text must be escaped
+        assert "hello &lt;world&gt;" in html
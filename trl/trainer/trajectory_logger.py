@@ -17,16 +17,265 @@ Usage in GRPOTrainer:
     logger.finalize_trajectories(trajectories, step, mode)
 """
 
+import atexit
 import json
+import multiprocessing as mp
 import os
+import random
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from collections import defaultdict
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to JSON bytes, using orjson (C implementation) when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Escape table applied with str.translate: a single C-level pass over the string,
+# cheaper than html.escape's chained replaces for long generated text
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+# Report body template, compiled once on first use; rendering a whole trajectory
+# (metadata line plus all turns) is then a single call into jinja2's generated
+# bytecode instead of many f-string concatenations per turn
+_TRAJECTORY_TMPL_STR = """
+    <div class="trajectory">
+        <div class="metadata">
+            <strong>Trajectory ID:</strong> {{ trajectory_id }} |
+            <strong>Step:</strong> {{ metadata.step }} |
+            <strong>Length:</strong> {{ metadata.trajectory_length }} turns |
+            <strong>Reward:</strong> <span class="{{ reward_class }}">{{ "%.2f" % reward }}</span>
+        </div>
+{% for turn in turns %}
+        <div class="turn">
+            <div class="turn-header">Turn {{ turn.turn_idx + 1 }}</div>
+{% if turn.image_path is defined %}            <img src="{{ turn.image_path }}" class="image" />
+{% elif turn.image_error is defined %}            <p style="color: red;">Image error: {{ turn.image_error | esc }}</p>
+{% endif %}{% if turn.prompt is defined %}
+            <div class="prompt">
+                <strong>Prompt:</strong><br>
+                {{ turn.prompt | esc }}
+            </div>
+{% endif %}{% if turn.response is defined %}
+            <div class="response">
+                <strong>Response:</strong><br>
+                {{ turn.response | esc }}
+            </div>
+{% endif %}
+        </div>
+{% endfor %}
+    </div>
+"""
+
+_trajectory_template = None
+
+
+def _get_trajectory_template():
+    """Return the compiled jinja2 template, or None when jinja2 is not installed
+    (it is not a declared dependency), in which case the plain f-string renderer
+    below is used instead."""
+    global _trajectory_template
+    if _trajectory_template is None:
+        try:
+            import jinja2
+        except ImportError:
+            return None
+
+        environment = jinja2.Environment()
+        # Text fields are escaped with the translate table rather than autoescape
+        environment.filters["esc"] = lambda s: s.translate(_HTML_ESCAPE)
+        _trajectory_template = environment.from_string(_TRAJECTORY_TMPL_STR)
+    return _trajectory_template
+
+
+def _write_trajectory_plain(out, trajectory_id, metadata, reward, reward_class, turns):
+    """Fallback renderer mirroring _TRAJECTORY_TMPL_STR with plain f-strings."""
+    out.write(f"""
+    <div class="trajectory">
+        <div class="metadata">
+            <strong>Trajectory ID:</strong> {trajectory_id} |
+            <strong>Step:</strong> {metadata['step']} |
+            <strong>Length:</strong> {metadata['trajectory_length']} turns |
+            <strong>Reward:</strong> <span class="{reward_class}">{reward:.2f}</span>
+        </div>
+""")
+    for turn in turns:
+        out.write(f"""
+        <div class="turn">
+            <div class="turn-header">Turn {turn["turn_idx"] + 1}</div>
+""")
+        if "image_path" in turn:
+            out.write(f'            <img src="{turn["image_path"]}" class="image" />\n')
+        elif "image_error" in turn:
+            out.write(f'            <p style="color: red;">Image error: {turn["image_error"].translate(_HTML_ESCAPE)}</p>\n')
+        if "prompt" in turn:
+            out.write(f"""
+            <div class="prompt">
+                <strong>Prompt:</strong><br>
+                {turn["prompt"].translate(_HTML_ESCAPE)}
+            </div>
+""")
+        if "response" in turn:
+            out.write(f"""
+            <div class="response">
+                <strong>Response:</strong><br>
+                {turn["response"].translate(_HTML_ESCAPE)}
+            </div>
+""")
+        out.write("""
+        </div>
+""")
+    out.write("""
+    </div>
+""")
+
+
+def _writer_main(queue, flush_event):
+    """Entry point of the background writer process; owns all trajectory disk I/O.
+
+    Handles five message kinds until it receives ``None``: "image" (rebuild a PIL
+    image from raw bytes and encode it), "append" (os.write pre-serialized JSONL
+    bytes, opening one fd per path on first use), "close" (release a path's fd),
+    "remove" (unlink the files of an evicted trajectory), and "flush" (set
+    ``flush_event`` to acknowledge that every earlier message has been processed).
+    """
+    fds = {}
+    while True:
+        msg = queue.get()
+        if msg is None:
+            break
+        try:
+            kind = msg["kind"]
+            if kind == "image":
+                from PIL import Image
+
+                image = Image.frombytes(msg["mode"], msg["size"], msg["data"])
+                _save_image(image, msg["path"], msg["format"])
+            elif kind == "append":
+                path = msg["path"]
+                fd = fds.get(path)
+                if fd is None:
+                    fd = fds[path] = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                os.write(fd, msg["buf"])
+            elif kind == "close":
+                fd = fds.pop(msg["path"], None)
+                if fd is not None:
+                    os.close(fd)
+            elif kind == "remove":
+                path = msg["path"]
+                fd = fds.pop(path, None)
+                if fd is not None:
+                    os.close(fd)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            elif kind == "flush":
+                # The queue is FIFO, so reaching this message means everything
+                # enqueued before it has been written
+                flush_event.set()
+        except Exception as e:
+            print(f"TrajectoryLogger writer error: {e}")
+    for fd in fds.values():
+        os.close(fd)
+
+
+def _save_image(image, path, image_format):
+    """Encode and write a PIL image (runs in the writer process, off the trainer).
+
+    Output goes through a 1 MiB BufferedWriter so encoder output is flushed in
+    large blocks rather than the default 4-8 KiB writes.
+    """
+    with open(path, "wb", buffering=1 << 20) as f:
+        if image_format == "jpeg":
+            # JPEG encode is typically 5-10x faster than PNG for photographic frames
+            image.convert("RGB").save(f, format="JPEG", quality=85)
+        elif image_format == "raw":
+            # Raw pixel dump: a memcpy plus a small header, ~50x faster than PNG's
+            # deflate pipeline at the cost of disk space
+            import numpy as np
+
+            np.save(f, np.asarray(image), allow_pickle=False)
+        else:
+            image.save(f, format="PNG", compress_level=1, optimize=False)
+
+
+class _TurnRecord:
+    """Mutable record for one logged turn.
+
+    ``__slots__`` gives these a fixed C-array layout instead of a per-instance
+    dict, cutting allocator/GC pressure across the many turns of a long run.
+    Unset fields stay None and are dropped at serialization time; ``prompt_ids``
+    only holds data between log_turn and finalize and is never serialized.
+    """
+
+    __slots__ = (
+        "turn_idx",
+        "prompt_ids",
+        "prompt",
+        "prompt_delta",
+        "prompt_prefix_len",
+        "response",
+        "image_path",
+        "image_error",
+    )
+
+    def __init__(self, turn_idx):
+        self.turn_idx = turn_idx
+        self.prompt_ids = None
+        self.prompt = None
+        self.prompt_delta = None
+        self.prompt_prefix_len = None
+        self.response = None
+        self.image_path = None
+        self.image_error = None
+
+    def to_dict(self):
+        return {
+            slot: value
+            for slot in self.__slots__
+            if slot != "prompt_ids" and (value := getattr(self, slot)) is not None
+        }
+
+
+class _Trajectory:
+    """Bookkeeping for one in-flight trajectory (also ``__slots__``-based)."""
+
+    __slots__ = ("trajectory_id", "pending_turns", "image_files", "metadata")
+
+    def __init__(self, trajectory_id, step, prompt_idx, gen_idx):
+        self.trajectory_id = trajectory_id
+        self.pending_turns = []
+        self.image_files = []
+        self.metadata = {"step": step, "prompt_idx": prompt_idx, "gen_idx": gen_idx}
 
 
 class TrajectoryLogger:
-    """Save trajectory generation details to disk turn-by-turn (memory efficient)."""
+    """Save trajectory generation details to disk turn-by-turn (memory efficient).
+
+    Disk writes happen asynchronously in a background process: call ``flush()``
+    before reading the output directory and ``close()`` when done with the
+    logger (``close`` is also registered with atexit as a safety net).
+    """
+
+    # Per-step trajectory counts older than this many steps are evicted; only the
+    # current step's count is ever consulted, so old entries are safe to drop
+    _MAX_TRACKED_STEPS = 1024
 
     def __init__(
         self,
@@ -35,6 +284,8 @@ class TrajectoryLogger:
         save_prompts: bool = True,
         save_responses: bool = True,
         max_trajectories_per_step: Optional[int] = None,
+        image_format: str = "jpeg",
+        image_max_dim: Optional[int] = 512,
     ):
         """
         Initialize trajectory logger.
@@ -44,7 +295,13 @@ class TrajectoryLogger:
             save_images: Whether to save images
             save_prompts: Whether to save prompt text
             save_responses: Whether to save model responses
-            max_trajectories_per_step: Max trajectories to save per step (None = all)
+            max_trajectories_per_step: Max trajectories to save per step (None = all);
+                kept uniformly at random via reservoir sampling
+            image_format: "jpeg" (fast, lossy), "png" (lossless, fast deflate), or "raw"
+                (.npy pixel dump, no encode cost; not viewable in the HTML report)
+            image_max_dim: Downscale frames so their longest side is at most this
+                before saving (None = keep full resolution); the HTML report caps
+                display width at 512px anyway
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -53,16 +310,44 @@ class TrajectoryLogger:
         self.save_prompts = save_prompts
         self.save_responses = save_responses
         self.max_trajectories_per_step = max_trajectories_per_step
-
-        # Create subdirectories
+        if image_format not in ("jpeg", "png", "raw"):
+            raise ValueError(f"image_format must be 'jpeg', 'png', or 'raw', got {image_format!r}")
+        self.image_format = image_format
+        self._image_ext = {"jpeg": "jpg", "png": "png", "raw": "npy"}[image_format]
+        self.image_max_dim = image_max_dim
+
+        # Create subdirectories; cache them as plain strings so per-turn path
+        # construction is a str concat rather than Path.__truediv__ allocations
         if save_images:
             (self.output_dir / "images").mkdir(exist_ok=True)
         (self.output_dir / "trajectories").mkdir(exist_ok=True)
+        self._images_dir_str = str(self.output_dir / "images")
+        self._traj_dir_str = str(self.output_dir / "trajectories")
 
         # Track trajectories being logged
-        # Key: (step, prompt_idx, gen_idx), Value: {turns: [...], metadata: {...}}
+        # Key: (step, prompt_idx, gen_idx), Value: _Trajectory
+        # Turn records (token ids + response text, never decoded prompts) are held
+        # here until finalize writes the whole step as one JSONL file.
         self.active_trajectories = {}
-        self.trajectories_logged_per_step = defaultdict(int)
+        # Bounded LRU counter of trajectories seen per step, used as the reservoir
+        # size i (a plain defaultdict would grow by one entry per step forever)
+        self.trajectories_logged_per_step = OrderedDict()
+
+        # Tokenizer cached from the first log_turn call; prompt decoding is deferred
+        # to one batch_decode per finalize instead of one decode per turn
+        self.processing_class = None
+
+        # All disk I/O runs in a dedicated writer process fed through a bounded
+        # queue: PIL's encoders hold the GIL, so even a thread pool would stall the
+        # trainer's Python threads. The bounded queue applies back-pressure if the
+        # writer falls behind.
+        self._queue = mp.Queue(maxsize=64)
+        self._flush_event = mp.Event()
+        self._writer_proc = mp.Process(target=_writer_main, args=(self._queue, self._flush_event), daemon=True)
+        self._writer_proc.start()
+        # The writer is a daemon, so interpreter exit would discard anything still
+        # queued; drain it at exit for callers that never reach close()
+        atexit.register(self.close)
 
     def log_turn(
         self,
@@ -70,7 +355,7 @@ class TrajectoryLogger:
         prompt_idx: int,
         gen_idx: int,
         turn_idx: int,
-        prompt_ids: List[int],
+        prompt_ids: Any,
         completion: str,
         image: Optional[Any] = None,
         processing_class: Optional[Any] = None,
@@ -83,64 +368,96 @@ class TrajectoryLogger:
             prompt_idx: Prompt index in batch
             gen_idx: Generation index (0 to num_generations-1)
             turn_idx: Turn index in trajectory
-            prompt_ids: Token IDs of prompt
+            prompt_ids: Token IDs of prompt; a list, numpy array, or torch tensor.
+                Callers can pass the raw tensor: it is never touched unless prompts
+                are saved, and conversion happens once at finalize
             completion: Model response text
             image: PIL Image (if present)
             processing_class: Tokenizer for decoding
         """
-        # Check limit
-        if (
-            self.max_trajectories_per_step is not None
-            and self.trajectories_logged_per_step[step] >= self.max_trajectories_per_step
-        ):
-            return
-
         traj_key = (step, prompt_idx, gen_idx)
         traj_id = f"step{step:06d}_p{prompt_idx:03d}_g{gen_idx:02d}"
 
         # Initialize trajectory if first turn
         if traj_key not in self.active_trajectories:
-            self.active_trajectories[traj_key] = {
-                "trajectory_id": traj_id,
-                "turns": [],
-                "metadata": {
-                    "step": step,
-                    "prompt_idx": prompt_idx,
-                    "gen_idx": gen_idx,
-                },
-            }
-            self.trajectories_logged_per_step[step] += 1
-
-        turn_data = {
-            "turn_idx": turn_idx,
-        }
-
-        # Save prompt text
+            # New trajectories only ever appear on their first turn; an unknown key
+            # on a later turn was rejected or evicted by the sampler below
+            if turn_idx != 0:
+                return
+            seen = self.trajectories_logged_per_step.get(step, 0) + 1
+            self.trajectories_logged_per_step[step] = seen
+            self.trajectories_logged_per_step.move_to_end(step)
+            while len(self.trajectories_logged_per_step) > self._MAX_TRACKED_STEPS:
+                self.trajectories_logged_per_step.popitem(last=False)
+
+            # Reservoir sampling keeps a uniform random subset of the step's
+            # trajectories at the cap (plain first-N was biased toward low
+            # prompt_idx/gen_idx): candidate i is accepted with probability
+            # cap/i and replaces a uniformly random kept trajectory
+            if self.max_trajectories_per_step is not None and seen > self.max_trajectories_per_step:
+                if random.random() >= self.max_trajectories_per_step / seen:
+                    return
+                # The kept set can be smaller than the cap (it is emptied by
+                # finalize, and a later rollout round may reuse the step); only
+                # evict when the reservoir is actually full
+                kept_keys = [key for key in self.active_trajectories if key[0] == step]
+                if len(kept_keys) >= self.max_trajectories_per_step:
+                    evicted = self.active_trajectories.pop(random.choice(kept_keys))
+                    for image_file in evicted.image_files:
+                        self._queue.put({"kind": "remove", "path": image_file})
+
+            self.active_trajectories[traj_key] = _Trajectory(traj_id, step, prompt_idx, gen_idx)
+
+        turn_data = _TurnRecord(turn_idx)
+
+        # Stash raw prompt ids; decoding happens in one batch_decode at finalize,
+        # avoiding per-turn tokenizer call overhead
         if self.save_prompts and processing_class is not None:
-            prompt_text = processing_class.decode(prompt_ids, skip_special_tokens=True)
-            turn_data["prompt"] = prompt_text
+            if self.processing_class is None:
+                self.processing_class = processing_class
+            turn_data.prompt_ids = prompt_ids
 
         # Save response
         if self.save_responses:
-            turn_data["response"] = completion
+            turn_data.response = completion
 
         # Save image immediately
         if self.save_images and image is not None:
-            image_filename = f"{traj_id}_turn{turn_idx:02d}.png"
-            image_path = self.output_dir / "images" / image_filename
+            image_filename = f"{traj_id}_turn{turn_idx:02d}.{self._image_ext}"
+            image_path = f"{self._images_dir_str}/{image_filename}"
             try:
-                # Check if it's a PIL Image
-                if hasattr(image, 'save'):
-                    image.save(image_path)
-                    # Use relative path for portability
-                    turn_data["image_path"] = f"images/{image_filename}"
+                # Check if it's a PIL Image (numpy arrays also have tobytes,
+                # but must hit the error path below rather than the queue)
+                if hasattr(image, 'save') and hasattr(image, 'tobytes'):
+                    # Encode cost is roughly linear in pixel count, so downscale
+                    # oversized frames first (also shrinks the queue payload)
+                    if self.image_max_dim is not None and max(image.size) > self.image_max_dim:
+                        from PIL import Image as PILImage
+
+                        image = image.copy()
+                        image.thumbnail((self.image_max_dim, self.image_max_dim), PILImage.BILINEAR)
+                    # tobytes() detaches the pixels from the caller's image; the
+                    # writer process rebuilds and encodes it off the trainer
+                    self._queue.put({
+                        "kind": "image",
+                        "path": image_path,
+                        "mode": image.mode,
+                        "size": image.size,
+                        "data": image.tobytes(),
+                        "format": self.image_format,
+                    })
+                    # Use relative path for portability; track the absolute path so
+                    # the file can be removed if this trajectory is evicted
+                    turn_data.image_path = f"images/{image_filename}"
+                    self.active_trajectories[traj_key].image_files.append(image_path)
                 else:
-                    turn_data["image_error"] = f"Not a PIL Image: {type(image)}"
+                    turn_data.image_error = f"Not a PIL Image: {type(image)}"
             except Exception as e:
-                turn_data["image_error"] = str(e)
+                turn_data.image_error = str(e)
 
-        # Add turn to trajectory
-        self.active_trajectories[traj_key]["turns"].append(turn_data)
+        # Hold the compact record (raw ids, no decoded text) until finalize, which
+        # writes the whole step in one shot
+        self.active_trajectories[traj_key].pending_turns.append(turn_data)
 
     def finalize_trajectories(
         self,
@@ -156,9 +473,51 @@ class TrajectoryLogger:
             step: Global training step
             mode: "train" or "eval"
         """
+        # Decode all deferred prompts in a single batch_decode call. Queue FIFO
+        # ordering guarantees image writes queued during the step land before the
+        # records referencing them.
+        # Each turn's prompt normally extends the previous turn's verbatim, so only
+        # the new suffix is decoded and stored ("prompt_delta"); this keeps total
+        # text O(N) instead of O(N^2) in trajectory length. The first turn (or any
+        # turn that breaks the prefix property) stores the full "prompt".
+        pending_turns = []
+        pending_ids = []
+        for logged_traj in self.active_trajectories.values():
+            prev_ids = None
+            for turn in logged_traj.pending_turns:
+                ids = turn.prompt_ids
+                turn.prompt_ids = None
+                if ids is None:
+                    continue
+                # Tensors/arrays are stashed as-is by log_turn; one tolist() here
+                # (a single host transfer for GPU tensors) instead of per turn
+                if hasattr(ids, "tolist"):
+                    ids = ids.tolist()
+                if prev_ids is not None and len(ids) >= len(prev_ids) and ids[: len(prev_ids)] == prev_ids:
+                    turn.prompt_prefix_len = len(prev_ids)
+                    pending_ids.append(ids[len(prev_ids):])
+                else:
+                    pending_ids.append(ids)
+                pending_turns.append(turn)
+                prev_ids = ids
+        if pending_turns and self.processing_class is not None:
+            texts = self.processing_class.batch_decode(pending_ids, skip_special_tokens=True)
+            for turn, text in zip(pending_turns, texts):
+                if turn.prompt_prefix_len is not None:
+                    turn.prompt_delta = text
+                else:
+                    turn.prompt = text
         num_prompts = len(trajectories)
         num_generations = len(trajectories[0]) if num_prompts > 0 else 0
 
+        # All trajectories in this call are finalized at the same moment; one
+        # clock read and strftime instead of one per (prompt_idx, gen_idx)
+        now_iso = datetime.now().isoformat()
+
+        # All of the step's trajectories land in a single JSONL file, one line
+        # each: one open/write/close instead of num_prompts * num_generations
+        # tiny files hammering filesystem metadata
+        step_lines = []
         for prompt_idx in range(num_prompts):
             for gen_idx in range(num_generations):
                 traj_key = (step, prompt_idx, gen_idx)
@@ -171,32 +530,68 @@ class TrajectoryLogger:
                 logged_traj = self.active_trajectories[traj_key]
 
                 # Add final metadata
-                logged_traj["metadata"].update({
+                logged_traj.metadata.update({
                     "mode": mode,
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": now_iso,
                     "trajectory_length": traj.get("trajectory_length", 0),
                     "done": traj.get("done", False),
                     "terminated_naturally": traj.get("terminated_naturally", False),
                 })
 
-                # Add reward
-                logged_traj["reward"] = traj.get("reward", 0.0)
-
-                # Save to JSON
-                traj_id = logged_traj["trajectory_id"]
-                json_path = self.output_dir / "trajectories" / f"{traj_id}.json"
-                with open(json_path, "w") as f:
-                    json.dump(logged_traj, f, indent=2)
+                step_lines.append(_json_dumps({
+                    "trajectory_id": logged_traj.trajectory_id,
+                    "turns": [turn.to_dict() for turn in logged_traj.pending_turns],
+                    "metadata": logged_traj.metadata,
+                    "reward": traj.get("reward", 0.0),
+                }) + b"\n")
 
                 # Remove from active tracking
                 del self.active_trajectories[traj_key]
 
+        if step_lines:
+            step_path = f"{self._traj_dir_str}/step{step:06d}_{mode}.jsonl"
+            self._queue.put({"kind": "append", "path": step_path, "buf": b"".join(step_lines)})
+            self._queue.put({"kind": "close", "path": step_path})
+
+        # Reset the reservoir counter so a later rollout round at the same step
+        # (e.g. eval at an unchanged global_step) starts a fresh sample instead of
+        # inheriting a "seen" count whose kept set was just emptied
+        self.trajectories_logged_per_step.pop(step, None)
+
         # Clean up any remaining trajectories (shouldn't happen, but safety)
         if self.active_trajectories:
             remaining = len(self.active_trajectories)
             self.active_trajectories.clear()
             print(f"Warning: {remaining} trajectories were not finalized properly")
 
+    def flush(self):
+        """Block until every write enqueued so far has reached disk.
+
+        Readers of the output directory (e.g. generate_html_report) must call
+        this first: finalize_trajectories only enqueues writes, and the writer
+        process may not have processed them yet.
+        """
+        if not self._writer_proc.is_alive():
+            return
+        self._flush_event.clear()
+        self._queue.put({"kind": "flush"})
+        # Poll so a writer that died mid-flush doesn't hang the trainer forever
+        while not self._flush_event.wait(timeout=1.0):
+            if not self._writer_proc.is_alive():
+                return
+
+    def close(self):
+        """Drain queued writes and stop the background writer process."""
+        if self._writer_proc.is_alive():
+            self._queue.put(None)
+            self._writer_proc.join()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
     def generate_html_report(self, step: Optional[int] = None):
         """
         Generate HTML report for visualizing trajectories.
@@ -204,22 +599,39 @@ class TrajectoryLogger:
         Args:
             step: If specified, only generate report for this step
         """
-        import glob
+        # Make sure everything already enqueued is on disk before scanning
+        self.flush()
+
+        # Find all trajectory files; os.scandir with plain prefix/suffix checks avoids
+        # glob's fnmatch pass, which matters once the directory holds many thousands
+        # of files from long runs
+        prefix = f"step{step:06d}_" if step is not None else ""
+        trajectory_files = sorted(
+            entry.path
+            for entry in os.scandir(self.output_dir / "trajectories")
+            if entry.is_file() and entry.name.endswith(".jsonl") and entry.name.startswith(prefix)
+        )
+
+        if not trajectory_files:
+            print(f"No trajectories found for step {step}")
+            return
 
-        # Find all trajectory files
         if step is not None:
-            pattern = str(self.output_dir / "trajectories" / f"step{step:06d}_*.json")
+            html_path = self.output_dir / f"report_step{step:06d}.html"
         else:
-            pattern = str(self.output_dir / "trajectories" / "*.json")
+            html_path = self.output_dir / "report_all.html"
 
-        trajectory_files = sorted(glob.glob(pattern))
+        # Stream the report straight to disk with a large userspace buffer; building
+        # it via string concatenation made peak memory proportional to report size
+        with open(html_path, "w", buffering=1 << 20) as out:
+            self._write_html_report(out, trajectory_files)
 
-        if not trajectory_files:
-            print(f"No trajectories found for step {step}")
-            return
+        print(f"✓ HTML report saved to: {html_path}")
+        return html_path
 
-        # Generate HTML
-        html = """<!DOCTYPE html>
+    def _write_html_report(self, out, trajectory_files):
+        trajectory_template = _get_trajectory_template()
+        out.write("""<!DOCTYPE html>
 <html>
 <head>
     <title>Trajectory GRPO Logs</title>
@@ -239,78 +651,40 @@ class TrajectoryLogger:
 </head>
 <body>
     <h1>Trajectory GRPO Generation Logs</h1>
-"""
+""")
 
         for traj_file in trajectory_files:
-            with open(traj_file, "r") as f:
-                traj_data = json.load(f)
-
-            metadata = traj_data["metadata"]
-            reward = traj_data.get("reward", 0.0)
-            reward_class = "positive" if reward >= 0 else "negative"
-
-            html += f"""
-    <div class="trajectory">
-        <div class="metadata">
-            <strong>Trajectory ID:</strong> {traj_data['trajectory_id']} |
-            <strong>Step:</strong> {metadata['step']} |
-            <strong>Length:</strong> {metadata['trajectory_length']} turns |
-            <strong>Reward:</strong> <span class="{reward_class}">{reward:.2f}</span>
-        </div>
-"""
-
-            for turn in traj_data.get("turns", []):
-                turn_idx = turn["turn_idx"]
-                html += f"""
-        <div class="turn">
-            <div class="turn-header">Turn {turn_idx + 1}</div>
-"""
-
-                # Image
-                if "image_path" in turn:
-                    html += f'            <img src="{turn["image_path"]}" class="image" />\n'
-                elif "image_error" in turn:
-                    html += f'            <p style="color: red;">Image error: {turn["image_error"]}</p>\n'
-
-                # Prompt
-                if "prompt" in turn:
-                    html += f"""
-            <div class="prompt">
-                <strong>Prompt:</strong><br>
-                {turn["prompt"]}
-            </div>
-"""
-
-                # Response
-                if "response" in turn:
-                    html += f"""
-            <div class="response">
-                <strong>Response:</strong><br>
-                {turn["response"]}
-            </div>
-"""
-
-                html += """
-        </div>
-"""
-
-            html += """
-    </div>
-"""
-
-        html += """
+            # Each per-step file holds one complete trajectory per line
+            with open(traj_file, "rb") as f:
+                for line in f:
+                    traj_data = _json_loads(line)
+
+                    # Rebuild full prompts from delta-encoded turn records
+                    running_prompt = None
+                    for turn in traj_data.get("turns", []):
+                        if "prompt_delta" in turn:
+                            running_prompt = (running_prompt or "") + turn["prompt_delta"]
+                            turn["prompt"] = running_prompt
+                        elif "prompt" in turn:
+                            running_prompt = turn["prompt"]
+
+                    reward = traj_data.get("reward", 0.0)
+                    reward_class = "positive" if reward >= 0 else "negative"
+                    turns = traj_data.get("turns", [])
+                    if trajectory_template is not None:
+                        out.write(trajectory_template.render(
+                            trajectory_id=traj_data["trajectory_id"],
+                            metadata=traj_data["metadata"],
+                            reward=reward,
+                            reward_class=reward_class,
+                            turns=turns,
+                        ))
+                    else:
+                        _write_trajectory_plain(
+                            out, traj_data["trajectory_id"], traj_data["metadata"], reward, reward_class, turns
+                        )
+
+        out.write("""
 </body>
 </html>
-"""
-
-        # Save HTML
-        if step is not None:
-            html_path = self.output_dir / f"report_step{step:06d}.html"
-        else:
-            html_path = self.output_dir / "report_all.html"
-
-        with open(html_path, "w") as f:
-            f.write(html)
-
-        print(f"✓ HTML report saved to: {html_path}")
-        return html_path
+""")